@@ -10,6 +10,7 @@ Usage:
     python main.py                              # Run in GUI mode (using PyAutoGUI)
     python main.py --file problem0.txt          # Run from a problem file
     python main.py --file problem0.txt --algorithm qubo  # Use QUBO algorithm
+    python main.py --file problem0.txt --algorithm milp  # Use exact MILP algorithm
 """
 
 import argparse
@@ -30,8 +31,8 @@ def main():
         "-a",
         type=str,
         default="dfs",
-        choices=["dfs", "qubo"],
-        help="Algorithm to use (dfs or qubo)",
+        choices=["dfs", "qubo", "milp"],
+        help="Algorithm to use (dfs, qubo or milp)",
     )
     args = parser.parse_args()
 
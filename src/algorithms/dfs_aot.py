@@ -0,0 +1,75 @@
+"""
+Ahead-of-time build of the DFS search kernel.
+
+Compiles _search_nb into the extension module src/algorithms/dfs_kernels_aot,
+which DFSSolver imports instead of JIT compiling (or loading from the JIT
+cache) on first use. The module embeds a stamp of the kernel source;
+DFSSolver falls back to the JIT kernel when it does not match, so rebuild
+after editing dfs_solver.py:
+
+    python -m src.algorithms.dfs_aot
+
+numba.pycc is deprecated and slated for removal from Numba; once it is gone
+this build is unavailable and the JIT kernel is used.
+"""
+
+import os
+
+from numba.pycc import CC
+
+from src.algorithms.dfs_solver import _kernel_stamp, _search_nb
+
+cc = CC("dfs_kernels_aot")
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Frozen into build_stamp as a constant when compiled
+_BUILD_STAMP = _kernel_stamp()
+
+
+@cc.export("build_stamp", "int64()")
+def build_stamp():
+    return _BUILD_STAMP
+
+
+@cc.export(
+    "search",
+    "void(int8[:, ::1], uint64, uint64[:, :, ::1], int32[:, :, ::1], "
+    "int8[:, :, ::1], int16[:, :, ::1], uint64[::1], int64[::1], int32[:, ::1], "
+    "int64, int64, int32[::1], int32[:, ::1], int64[::1])",
+)
+def search(
+    grid,
+    grid_hash,
+    zobrist,
+    cum_sums,
+    undo_log,
+    moves,
+    visited,
+    visited_count,
+    path,
+    start_depth,
+    start_score,
+    best_intermediate_scores,
+    best_path,
+    best,
+):
+    _search_nb(
+        grid,
+        grid_hash,
+        zobrist,
+        cum_sums,
+        undo_log,
+        moves,
+        visited,
+        visited_count,
+        path,
+        start_depth,
+        start_score,
+        best_intermediate_scores,
+        best_path,
+        best,
+    )
+
+
+if __name__ == "__main__":
+    cc.compile()
@@ -1,19 +1,38 @@
-from typing import List, Set
-from collections import defaultdict
+import hashlib
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
 import numpy as np
+from numba import njit
 
 from src.models.box import Box, Strategy
 import src.config as config
 from src.algorithms.solver import Solver
+from src.utils.grid_utils import ZOBRIST_KEYS, zobrist_hash
 
-# Type aliases (for documentation purposes)
-Grid = List[List[int]]
+# Cumulative sum entries pack the apple count above the value sum, which is
+# at most 9 * HEIGHT * WIDTH and fits below this bit
+_COUNT_SHIFT = 16
+_SUM_MASK = (1 << _COUNT_SHIFT) - 1
+
+# Search budget: stop expanding new states once this many have been visited
+_MAX_VISITED = 1000
+# Slots in each visited hash table (a power of two, well above the budget)
+_VISITED_CAPACITY = 1 << 12
 
 
 class DFSSolver(Solver):
     """DFS-based solver for the Apple Box Game"""
 
-    def solve(self, grid: Grid) -> Strategy:
+    name = "DFS"
+
+    def __init__(self):
+        self._zobrist = ZOBRIST_KEYS
+        # Open-addressed visited tables (0 = empty slot), one per parallel
+        # branch, reused across solve calls
+        self._visited = np.zeros((config.D, _VISITED_CAPACITY), dtype=np.uint64)
+
+    def _solve(self, grid: np.ndarray) -> Strategy:
         """
         Find the best strategy using DFS algorithm.
 
@@ -23,129 +42,394 @@ class DFSSolver(Solver):
         Returns:
             A Strategy object containing the optimal solution
         """
-        best_strategy = Strategy(boxes=[], score=0)
-        current_strategy = Strategy(boxes=[], score=0)
-        visited = set()
-        best_intermediate_scores = [float("inf")] * config.MAX_NUM_MOVES
-
-        self._recurse(
-            grid, visited, current_strategy, 0, best_intermediate_scores, best_strategy
+        np_grid = grid.copy()
+        grid_hash = zobrist_hash(np_grid)
+        best_intermediate_scores = np.full(
+            config.MAX_NUM_MOVES, np.iinfo(np.int32).max, dtype=np.int32
         )
+        self._visited.fill(0)
 
-        return best_strategy
+        if config.DFS_WORKERS > 1:
+            score, best_path = self._search_parallel(
+                np_grid, grid_hash, best_intermediate_scores
+            )
+        else:
+            cum_sums, undo_log, moves, path = self._new_buffers()
+            visited = (self._visited[0], np.zeros(1, dtype=np.int64))
+            score, best_path = self._search(
+                np_grid,
+                grid_hash,
+                best_intermediate_scores,
+                cum_sums,
+                undo_log,
+                moves,
+                visited,
+                path,
+                0,
+                0,
+            )
 
-    def _hash_grid(self, grid: Grid) -> int:
-        """Generate a hash value for the grid state."""
-        hash_val = 0
-        for row in grid:
-            for value in row:
-                hash_val = hash_val * 11 + value
-        return hash_val
+        boxes = [Box(int(x), int(y), int(w), int(h)) for x, y, w, h in best_path]
+        return Strategy(boxes=boxes, score=score)
 
-    def _recurse(
+    def _new_buffers(self):
+        """Allocate per-search cumsum tables, undo log, move lists and path."""
+        # One cumulative sum table, undo slot and move list per search depth
+        cum_sums = np.zeros(
+            (config.MAX_NUM_MOVES, config.HEIGHT + 1, config.WIDTH + 1), dtype=np.int32
+        )
+        undo_log = np.zeros(
+            (config.MAX_NUM_MOVES, config.HEIGHT, config.WIDTH), dtype=np.int8
+        )
+        # Move layout: (x, y, width, height, count)
+        moves = np.zeros((config.MAX_NUM_MOVES, config.D, 5), dtype=np.int16)
+        path = np.zeros((config.MAX_NUM_MOVES, 4), dtype=np.int32)
+        return cum_sums, undo_log, moves, path
+
+    def _search(
         self,
-        grid: Grid,
-        visited: Set[int],
-        current_strategy: Strategy,
+        grid: np.ndarray,
+        grid_hash: np.uint64,
+        best_intermediate_scores: np.ndarray,
+        cum_sums: np.ndarray,
+        undo_log: np.ndarray,
+        moves: np.ndarray,
+        visited: Tuple[np.ndarray, np.ndarray],
+        path: np.ndarray,
         num_moves: int,
-        best_intermediate_scores: List[int],
-        best_strategy: Strategy,
-    ) -> None:
-        """Recursively find the best strategy for the grid."""
-        # Update best strategy if current is better
-        if current_strategy.score > best_strategy.score:
-            best_strategy.boxes = current_strategy.boxes.copy()
-            best_strategy.score = current_strategy.score
-
-        # Pruning: Check if current strategy is underperforming
-        if (
-            num_moves > 0
-            and current_strategy.score < best_intermediate_scores[num_moves - 1]
-        ):
-            return
-        best_intermediate_scores[num_moves] = min(
-            best_intermediate_scores[num_moves], current_strategy.score
+        score: int,
+    ) -> Tuple[int, np.ndarray]:
+        """
+        Run the DFS kernel from a node and return (best score, best path).
+        grid is modified during the search and restored before returning.
+        visited is a (hash table, entry count) pair.
+        """
+        best_path = np.zeros_like(path)
+        best = np.zeros(2, dtype=np.int64)  # (score, number of moves)
+
+        # The ahead-of-time build holds the GIL, so threaded searches use the
+        # JIT kernel instead
+        kernel = _search_nb if config.DFS_WORKERS > 1 else _search_kernel
+        kernel(
+            grid,
+            grid_hash,
+            self._zobrist,
+            cum_sums,
+            undo_log,
+            moves,
+            visited[0],
+            visited[1],
+            path,
+            num_moves,
+            score,
+            best_intermediate_scores,
+            best_path,
+            best,
         )
 
-        # Pruning: Check if we've seen this grid state before
-        grid_hash = self._hash_grid(grid)
-        if grid_hash in visited:
-            return
-
-        # Pruning: Limit search depth
-        if len(visited) > 1000:
-            return
-
-        visited.add(grid_hash)
-
-        # Compute cumulative sums for efficient box sum calculations
-        cum_sum = [
-            [0 for _ in range(config.WIDTH + 1)] for _ in range(config.HEIGHT + 1)
-        ]
-        for i in range(config.HEIGHT):
-            for j in range(config.WIDTH):
-                cum_sum[i + 1][j + 1] = (
-                    cum_sum[i + 1][j] + cum_sum[i][j + 1] - cum_sum[i][j] + grid[i][j]
-                )
+        return int(best[0]), best_path[: best[1]]
 
-        # Find possible moves (boxes that sum to 10)
-        possible_moves = []
-        for y in range(config.HEIGHT):
-            for x in range(config.WIDTH):
-                for h in range(1, config.HEIGHT - y + 1):
-                    for w in range(1, config.WIDTH - x + 1):
-                        # Calculate sum using cumulative sum array
-                        box_sum = (
-                            cum_sum[y + h][x + w]
-                            - cum_sum[y + h][x]
-                            - cum_sum[y][x + w]
-                            + cum_sum[y][x]
-                        )
-
-                        if box_sum == 10:
-                            # Count non-zero values in the box
-                            count = 0
-                            for i in range(y, y + h):
-                                for j in range(x, x + w):
-                                    if grid[i][j] > 0:
-                                        count += 1
-
-                            # Only consider this move if it's one of the D best moves
-                            if len(possible_moves) < config.D:
-                                possible_moves.append((x, y, w, h, count))
-                                possible_moves.sort(
-                                    key=lambda move: move[4]
-                                )  # Sort by count
-                            elif count < possible_moves[-1][4]:
-                                possible_moves[-1] = (x, y, w, h, count)
-                                possible_moves.sort(key=lambda move: move[4])
-
-        # Try each of the best moves
-        for x, y, w, h, _ in possible_moves:
-            # Update grid by setting chosen values to 0
-            new_grid = [row.copy() for row in grid]
-            for i in range(y, y + h):
-                for j in range(x, x + w):
-                    new_grid[i][j] = 0
-
-            # Update strategy
-            box = Box(x, y, w, h)
-            current_strategy.boxes.append(box)
-            count = sum(
-                1 for i in range(y, y + h) for j in range(x, x + w) if grid[i][j] > 0
-            )
-            current_strategy.score += count
+    def _search_parallel(
+        self,
+        grid: np.ndarray,
+        grid_hash: np.uint64,
+        best_intermediate_scores: np.ndarray,
+    ) -> Tuple[int, np.ndarray]:
+        """
+        Search the subtree under each top-level move on its own thread.
 
-            # Recurse
-            self._recurse(
-                new_grid,
+        The kernel releases the GIL, so branches run concurrently. Each branch
+        has its own visited set, buffers and copy of best_intermediate_scores,
+        so a branch prunes only against its own subtree and the result does
+        not depend on thread timing. The copies are merged back into
+        best_intermediate_scores once every branch has finished.
+        """
+        # Expand the root node here, as _search_nb would
+        root_cum_sums = np.zeros((config.HEIGHT + 1, config.WIDTH + 1), dtype=np.int32)
+        _cumsum(grid, root_cum_sums, 0, 0)
+        root_moves = np.zeros((config.D, 5), dtype=np.int16)
+        num_root_moves = _enumerate_moves(root_cum_sums, root_moves)
+        best_intermediate_scores[0] = 0
+        branch_scores = np.tile(best_intermediate_scores, (num_root_moves, 1))
+
+        def search_branch(branch):
+            x, y, w, h, count = (int(v) for v in root_moves[branch])
+            cum_sums, undo_log, moves, path = self._new_buffers()
+            cum_sums[0] = root_cum_sums
+            visited = (self._visited[branch], np.zeros(1, dtype=np.int64))
+            _visit(visited[0], visited[1], grid_hash)
+            path[0] = (x, y, w, h)
+            branch_grid = grid.copy()
+            new_hash = _apply_move(
+                branch_grid,
+                grid_hash,
+                self._zobrist,
+                x,
+                y,
+                w,
+                h,
+                undo_log[0],
+            )
+            return self._search(
+                branch_grid,
+                np.uint64(new_hash),
+                branch_scores[branch],
+                cum_sums,
+                undo_log,
+                moves,
                 visited,
-                current_strategy,
-                num_moves + 1,
-                best_intermediate_scores,
-                best_strategy,
+                path,
+                1,
+                count,
             )
 
+        best_score, best_path = 0, np.zeros((0, 4), dtype=np.int32)
+        with ThreadPoolExecutor(max_workers=config.DFS_WORKERS) as executor:
+            # Earlier branches win ties, as in the serial search
+            for score, path in executor.map(search_branch, range(num_root_moves)):
+                if score > best_score:
+                    best_score, best_path = score, path
+
+        for scores in branch_scores:
+            np.minimum(best_intermediate_scores, scores, out=best_intermediate_scores)
+
+        return best_score, best_path
+
+
+@njit(cache=True, nogil=True)
+def _cumsum(grid, out, y0, x0):
+    """
+    Fill out with the (H+1)x(W+1) cumulative sum table of grid, with the
+    number of non-zero cells packed above bit _COUNT_SHIFT of each entry.
+    Only entries below row y0 and right of column x0 are recomputed; the
+    rest of out must already be valid for grid.
+    """
+    for i in range(y0, grid.shape[0]):
+        for j in range(x0, grid.shape[1]):
+            cell = grid[i, j]
+            if cell > 0:
+                cell += 1 << _COUNT_SHIFT
+            out[i + 1, j + 1] = out[i + 1, j] + out[i, j + 1] - out[i, j] + cell
+
+
+@njit(cache=True, nogil=True)
+def _enumerate_moves(cum_sum, moves_out):
+    """
+    Fill moves_out with the boxes summing to 10 that have the fewest apples,
+    sorted by count (earliest found first on ties). Returns the number found.
+    """
+    height = cum_sum.shape[0] - 1
+    width = cum_sum.shape[1] - 1
+    max_moves = moves_out.shape[0]
+    num_moves = 0
+    # Apple count a new move must beat; stays unbounded until the list fills
+    worst = 1 << 30
+    for y in range(height):
+        for x in range(width):
+            for h in range(1, height - y + 1):
+                for w in range(1, width - x + 1):
+                    # Calculate sum and apple count using cumulative sum array
+                    box = (
+                        cum_sum[y + h, x + w]
+                        - cum_sum[y + h, x]
+                        - cum_sum[y, x + w]
+                        + cum_sum[y, x]
+                    )
+                    if box & _SUM_MASK != 10:
+                        continue
+                    count = box >> _COUNT_SHIFT
+
+                    # Only keep the max_moves best moves: the last kept move
+                    # is the worst (most apples, latest found)
+                    if count >= worst:
+                        continue
+
+                    # Insertion sort: shift worse moves right, dropping the
+                    # last one if the list is full
+                    k = min(num_moves, max_moves - 1)
+                    while k > 0 and moves_out[k - 1, 4] > count:
+                        moves_out[k] = moves_out[k - 1]
+                        k -= 1
+                    moves_out[k, 0] = x
+                    moves_out[k, 1] = y
+                    moves_out[k, 2] = w
+                    moves_out[k, 3] = h
+                    moves_out[k, 4] = count
+                    num_moves = min(num_moves + 1, max_moves)
+                    if num_moves == max_moves:
+                        worst = moves_out[max_moves - 1, 4]
+
+    return num_moves
+
+
+@njit(cache=True, nogil=True)
+def _apply_move(grid, grid_hash, zobrist, x, y, w, h, undo):
+    """
+    Clear the box in place, saving its old values into undo.
+    Returns the Zobrist hash of the updated grid.
+    """
+    # XOR each removed apple out of the hash and the empty cell in
+    new_hash = grid_hash
+    for i in range(y, y + h):
+        for j in range(x, x + w):
+            undo[i - y, j - x] = grid[i, j]
+            if grid[i, j] > 0:
+                new_hash ^= zobrist[i, j, grid[i, j]] ^ zobrist[i, j, 0]
+                grid[i, j] = 0
+    return new_hash
+
+
+@njit(cache=True, nogil=True)
+def _undo_move(grid, x, y, w, h, undo):
+    """Restore the box values saved by _apply_move."""
+    for i in range(y, y + h):
+        for j in range(x, x + w):
+            grid[i, j] = undo[i - y, j - x]
+
+
+@njit(cache=True, nogil=True)
+def _visit(table, count, key):
+    """
+    Look key up in the open-addressed table, inserting it if absent.
+    Returns True if key was already present.
+    Linear probing; zero marks an empty slot, so a zero key is stored as 1.
+    """
+    if key == 0:
+        key = np.uint64(1)
+    mask = np.uint64(len(table) - 1)
+    slot = key & mask
+    while table[slot] != 0:
+        if table[slot] == key:
+            return True
+        slot = (slot + np.uint64(1)) & mask
+
+    table[slot] = key
+    count[0] += 1
+    return False
+
+
+@njit(cache=True, nogil=True)
+def _search_nb(
+    grid,
+    grid_hash,
+    zobrist,
+    cum_sums,
+    undo_log,
+    moves,
+    visited,
+    visited_count,
+    path,
+    start_depth,
+    start_score,
+    best_intermediate_scores,
+    best_path,
+    best,
+):
+    """
+    Depth-first search for the best strategy from a node at start_depth.
+
+    Iterative, with an explicit stack indexed by depth: moves[d] holds the
+    candidate moves of the node at depth d and next_move[d] the next one to
+    try, so a node is expanded once and its children are visited in order.
+    """
+    max_depth = moves.shape[0]
+    scores = np.zeros(max_depth + 1, dtype=np.int64)
+    hashes = np.zeros(max_depth + 1, dtype=np.uint64)
+    num_moves = np.zeros(max_depth, dtype=np.int64)
+    next_move = np.zeros(max_depth, dtype=np.int64)
+
+    depth = start_depth
+    scores[depth] = start_score
+    hashes[depth] = grid_hash
+    entering = True
+    while True:
+        if entering:
+            entering = False
+            score = scores[depth]
+            num_moves[depth] = 0
+            next_move[depth] = 0
+
+            # Update best strategy if current is better
+            if score > best[0]:
+                best[0] = score
+                best[1] = depth
+                best_path[:depth] = path[:depth]
+
+            # Pruning: Check if current strategy is underperforming, if we've
+            # seen this grid state before, or if the search budget is spent
+            expand = depth == 0 or score >= best_intermediate_scores[depth - 1]
+            if expand:
+                best_intermediate_scores[depth] = min(
+                    best_intermediate_scores[depth], score
+                )
+                expand = visited_count[0] <= _MAX_VISITED and not _visit(
+                    visited, visited_count, hashes[depth]
+                )
+
+            if expand:
+                # Update the cumulative sums from the parent's table: only
+                # cells below and right of the last box's top-left corner
+                # can have changed
+                cum_sum = cum_sums[depth]
+                if depth == 0:
+                    _cumsum(grid, cum_sum, 0, 0)
+                else:
+                    cum_sum[:, :] = cum_sums[depth - 1]
+                    _cumsum(grid, cum_sum, path[depth - 1, 1], path[depth - 1, 0])
+
+                # Find the best possible moves (boxes that sum to 10)
+                num_moves[depth] = _enumerate_moves(cum_sum, moves[depth])
+
+        if next_move[depth] < num_moves[depth]:
+            # Try the next move: apply it and descend
+            k = next_move[depth]
+            next_move[depth] += 1
+            x, y, w, h, count = moves[depth, k]
+            hashes[depth + 1] = _apply_move(
+                grid, hashes[depth], zobrist, x, y, w, h, undo_log[depth]
+            )
+            path[depth, 0] = x
+            path[depth, 1] = y
+            path[depth, 2] = w
+            path[depth, 3] = h
+            scores[depth + 1] = scores[depth] + count
+            depth += 1
+            entering = True
+        elif depth == start_depth:
+            break
+        else:
             # Backtrack
-            current_strategy.boxes.pop()
-            current_strategy.score -= count
+            depth -= 1
+            x, y, w, h = path[depth]
+            _undo_move(grid, x, y, w, h, undo_log[depth])
+
+
+def _kernel_stamp() -> int:
+    """
+    Identify the kernels by this module's source, as a non-negative int64
+    for the AOT module to embed.
+    """
+    with open(__file__, "rb") as f:
+        source = f.read()
+    digest = hashlib.sha256(source).digest()
+    return int.from_bytes(digest[:8], "little") >> 1
+
+
+def _load_aot_kernel():
+    """Return the prebuilt search kernel, or None if missing or out of date."""
+    try:
+        from src.algorithms import dfs_kernels_aot
+    except ImportError:
+        return None
+    build_stamp = getattr(dfs_kernels_aot, "build_stamp", None)
+    if build_stamp is None or build_stamp() != _kernel_stamp():
+        warnings.warn(
+            "dfs_kernels_aot was built from another DFS kernel source; using "
+            "the JIT kernel. Rebuild with: python -m src.algorithms.dfs_aot"
+        )
+        return None
+    return dfs_kernels_aot.search
+
+
+# Prebuilt by dfs_aot.py: no JIT compilation or cache loading at first use
+_search_kernel = _load_aot_kernel() or _search_nb
@@ -0,0 +1,58 @@
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+from src.models.box import Box, Strategy
+from src.algorithms.solver import Solver
+from src.utils.grid_utils import determine_box_order, find_candidate_boxes
+
+
+class MILPSolver(Solver):
+    """
+    Exact set-packing solver for the Apple Box Game.
+
+    Solves the same problem as the QUBO formulation (pick boxes with disjoint
+    apples maximizing the total apple count) as a binary integer program with
+    HiGHS, which proves optimality instead of sampling.
+    """
+
+    name = "MILP"
+
+    def _solve(self, grid: np.ndarray) -> Strategy:
+        """
+        Find the best strategy using mixed-integer linear programming.
+
+        Args:
+            grid: The game grid with apple values
+
+        Returns:
+            A Strategy object containing the optimal solution
+        """
+        # 1. Find all distinct boxes with sum 10 and the apples each covers
+        possible_boxes, A = find_candidate_boxes(grid)
+        if len(possible_boxes) == 0:
+            return Strategy(boxes=[], score=0)
+        n_boxes = len(possible_boxes)
+        counts = possible_boxes[:, 4]
+
+        # 2. Maximize apple count subject to each apple being used at most once
+        result = milp(
+            c=-counts.astype(np.float64),
+            constraints=LinearConstraint(A, -np.inf, 1),
+            integrality=np.ones(n_boxes),
+            bounds=Bounds(0, 1),
+        )
+        if result.x is None:
+            raise RuntimeError(f"MILP solve failed: {result.message}")
+
+        # 3. Extract the selected boxes
+        selected = np.flatnonzero(np.round(result.x) == 1)
+        box_objects = [
+            Box(x=int(x), y=int(y), width=int(w), height=int(h))
+            for x, y, w, h, _ in possible_boxes[selected]
+        ]
+
+        # 4. Determine optimal box selection order
+        ordered_boxes = determine_box_order(grid, box_objects)
+
+        total_score = int(counts[selected].sum())
+        return Strategy(boxes=ordered_boxes, score=total_score)
@@ -0,0 +1,93 @@
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+from src.models.box import Box, Strategy
+
+
+class _GridKey:
+    """Read-only grid snapshot that hashes and compares by its raw bytes."""
+
+    __slots__ = ("grid", "_bytes")
+
+    def __init__(self, grid: np.ndarray):
+        self.grid = np.array(grid, dtype=np.int8)
+        self.grid.setflags(write=False)
+        # One C-level pass over the contiguous buffer
+        self._bytes = self.grid.tobytes()
+
+    def __hash__(self) -> int:
+        return hash(self._bytes)
+
+    def __eq__(self, other) -> bool:
+        return self._bytes == other._bytes
+
+
+class Solver(ABC):
+    """Base class for Apple Box Game solvers"""
+
+    name = "base"
+
+    def solve(self, grid: np.ndarray) -> Strategy:
+        """
+        Find a strategy for the given grid.
+        Strategies are cached per grid, so solving a repeated grid is a lookup.
+
+        Args:
+            grid: The game grid with apple values
+
+        Returns:
+            A Strategy object containing the solution
+        """
+        boxes, score = self._solve_cached(_GridKey(grid))
+        return Strategy(boxes=[Box(*box) for box in boxes], score=score)
+
+    @lru_cache(maxsize=256)
+    def _solve_cached(
+        self, key: _GridKey
+    ) -> Tuple[Tuple[Tuple[int, int, int, int], ...], int]:
+        """Solve a grid and return the strategy in immutable tuple form."""
+        strategy = self._solve(key.grid)
+        boxes = tuple((box.x, box.y, box.width, box.height) for box in strategy.boxes)
+        return boxes, strategy.score
+
+    @abstractmethod
+    def _solve(self, grid: np.ndarray) -> Strategy:
+        """
+        Find a strategy for the given grid without caching.
+
+        Args:
+            grid: The game grid with apple values (read-only)
+
+        Returns:
+            A Strategy object containing the solution
+        """
+
+
+@lru_cache(maxsize=None)
+def get_solver(algorithm: str) -> Solver:
+    """
+    Get the solver registered under the given algorithm name.
+    Instances are shared so their strategy caches persist across calls.
+
+    Args:
+        algorithm: Algorithm to use ('dfs', 'qubo' or 'milp')
+
+    Returns:
+        A Solver instance
+    """
+    if algorithm == "dfs":
+        from src.algorithms.dfs_solver import DFSSolver
+
+        return DFSSolver()
+    if algorithm == "qubo":
+        from src.algorithms.qubo_solver import QUBOSolver
+
+        return QUBOSolver()
+    if algorithm == "milp":
+        from src.algorithms.milp_solver import MILPSolver
+
+        return MILPSolver()
+    raise ValueError(f"Unknown algorithm: {algorithm}")
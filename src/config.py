@@ -1,3 +1,5 @@
+import os
+
 # Grid dimensions
 HEIGHT = 10
 WIDTH = 17
@@ -5,10 +7,26 @@ WIDTH = 17
 # Algorithm parameters
 MAX_NUM_MOVES = HEIGHT * WIDTH // 2 + 1
 D = 4  # Number of best moves to consider in DFS
+# Threads searching top-level DFS branches (1 = serial search). Branches
+# prune independently, so results are deterministic but can differ from
+# the serial search
+DFS_WORKERS = 1
+QUBO_SAMPLER = "neal"  # "neal" (C++ on CPU) or "torch" (PyTorch, GPU if available)
+
+# Logging
+# Print the grid after every move (GUI) / log it after every simulated move
+# (file mode); set APPLEBOX_VERBOSE=1 to enable
+VERBOSE = os.environ.get("APPLEBOX_VERBOSE", "0") == "1"
 
 # GUI settings
 SCALE = 1  # Screenshot scaling factor
 SIZE = 33 * SCALE  # Cell size in pixels
+# Drag duration in seconds per cell of box diagonal (APPLEBOX_DRAG_COEF overrides).
+# pyautogui only animates drags longer than pyautogui.MINIMUM_DURATION (0.1 s)
+# and jumps the cursor straight to the target otherwise, which the game may not
+# register, so drags are never shorter than that (see run_with_pyautogui)
+DRAG_DURATION_COEF = float(os.environ.get("APPLEBOX_DRAG_COEF", "0.02"))
+POST_DRAG_SLEEP = 0.05  # Pause in seconds after each drag (VERBOSE only)
 
 # Game grid dimensions (for UI interaction)
 NUM_ROWS = HEIGHT
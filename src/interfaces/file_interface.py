@@ -1,15 +1,13 @@
 import time
 import os
 from typing import Optional
+import numpy as np
 
 from src.utils.logger import Logger
-from src.utils.grid_utils import (
-    read_problem_from_file,
-    print_grid,
-    update_grid_after_box,
-)
+from src.utils.grid_utils import apply_and_score, print_grid, read_problem_from_file
 from src.algorithms.solver import get_solver
 from src.models.box import Strategy
+import src.config as config
 
 
 def run_from_problem_file(
@@ -20,7 +18,7 @@ def run_from_problem_file(
 
     Args:
         problem_file: Path to the problem file
-        algorithm: Algorithm to use ('dfs' or 'qubo')
+        algorithm: Algorithm to use ('dfs', 'qubo' or 'milp')
         log_dir: Directory to save logs
 
     Returns:
@@ -36,10 +34,11 @@ def run_from_problem_file(
     grid = read_problem_from_file(problem_file)
     if grid is None:
         logger.log_message("Failed to read valid problem. Exiting.")
+        logger.close()
         return None
 
     # Calculate total apple sum
-    total = sum(sum(row) for row in grid)
+    total = int(grid.sum())
 
     # Print initial grid state
     logger.log_message(f"\nProblem Loaded! Total apple sum: {total}")
@@ -64,73 +63,72 @@ def run_from_problem_file(
     )
 
     # Save original problem
-    problem_filename = f"{logger.final_log_dir}/problem.txt"
-    with open(problem_filename, "w") as f:
-        for row in grid:
-            f.write(" ".join(str(cell) for cell in row) + "\n")
+    problem_filename = logger.problem_path
+    np.savetxt(problem_filename, grid, fmt="%d")
 
     # Save strategy
-    strategy_filename = f"{logger.final_log_dir}/strategy.txt"
+    strategy_filename = logger.strategy_path
     with open(strategy_filename, "w") as f:
-        f.write(f"Score: {strategy.score}\n")
-        f.write(f"Number of boxes: {len(strategy.boxes)}\n\n")
-        f.write("Boxes:\n")
-        for i, box in enumerate(strategy.boxes):
-            f.write(
+        f.write(
+            f"Score: {strategy.score}\n"
+            f"Number of boxes: {len(strategy.boxes)}\n\n"
+            "Boxes:\n"
+            + "".join(
                 f"Box {i+1}: x={box.x}, y={box.y}, width={box.width}, height={box.height}\n"
+                for i, box in enumerate(strategy.boxes)
             )
+        )
 
     # Simulate strategy execution process (like in GUI mode)
     logger.log_message("\n----- Simulating Strategy Execution -----")
     current_score = 0
-    current_grid = [row.copy() for row in grid]  # Make a copy of the original grid
+    # Copy of the original grid, updated in place
+    current_grid = grid.copy()
 
+    num_moves, target_score = len(strategy.boxes), strategy.score
+    verbose = config.VERBOSE
     for i, box in enumerate(strategy.boxes):
-        # Calculate box score
-        box_score = sum(
-            1
-            for i in range(box.y, box.y + box.height)
-            for j in range(box.x, box.x + box.width)
-            if current_grid[i][j] > 0
-        )
+        # Clear the box and count its apples in one pass
+        box_score = apply_and_score(current_grid, box.x, box.y, box.width, box.height)
         current_score += box_score
+        if box_score == 0 and not verbose:
+            # Nothing changed; skip the move's log lines
+            continue
 
         # Log box information and grid update
         logger.log_message(
-            f"\nMove {i+1}/{len(strategy.boxes)}: ({box.x}, {box.y}), width {box.width}, height {box.height}"
+            f"\nMove {i+1}/{num_moves}: ({box.x}, {box.y}), width {box.width}, height {box.height}"
         )
-        logger.log_message(f"Current score: {current_score}/{strategy.score}")
+        logger.log_message(f"Current score: {current_score}/{target_score}")
 
-        # Update grid after applying box
-        current_grid = update_grid_after_box(current_grid, box)
-        logger.log_message(print_grid(current_grid))
+        if verbose:
+            logger.log_message(print_grid(current_grid))
 
+    if not verbose:
+        logger.log_message(print_grid(current_grid))
     logger.log_message("\n----- Simulation Complete -----")
     logger.log_message(f"Final Score: {strategy.score}")
 
     # Save final grid state
-    final_grid_filename = f"{logger.final_log_dir}/final_grid.txt"
-    with open(final_grid_filename, "w") as f:
-        for row in current_grid:
-            f.write(" ".join(str(cell) for cell in row) + "\n")
+    final_grid_filename = logger.final_grid_path
+    np.savetxt(final_grid_filename, current_grid, fmt="%d")
 
     # Save result summary
-    with open(logger.log_filename, "a") as log_file:
-        log_file.write("\n" + "-" * 50 + "\n")
-        log_file.write("Game Result Summary:\n")
-        log_file.write(
-            f"- Execution Mode: File Mode\n"
-            f"- Problem File: {os.path.basename(problem_file)}\n"
-            f"- Total Apple Sum: {total}\n"
-            f"- Final Score: {strategy.score}\n"
-            f"- Number of Boxes Used: {len(strategy.boxes)}\n"
-            f"- Algorithm: {algorithm.upper()}\n"
-            f"- Algorithm Search Time: {search_duration:.2f} seconds\n"
-        )
-        log_file.write("-" * 50 + "\n")
+    separator = "-" * 50 + "\n"
+    logger.write(
+        "\n" + separator + "Game Result Summary:\n"
+        f"- Execution Mode: File Mode\n"
+        f"- Problem File: {os.path.basename(problem_file)}\n"
+        f"- Total Apple Sum: {total}\n"
+        f"- Final Score: {strategy.score}\n"
+        f"- Number of Boxes Used: {len(strategy.boxes)}\n"
+        f"- Algorithm: {algorithm.upper()}\n"
+        f"- Algorithm Search Time: {search_duration:.2f} seconds\n" + separator
+    )
 
     logger.log_message(
         f"All log files have been saved to {logger.final_log_dir} directory."
     )
+    logger.close()
 
     return strategy
@@ -1,73 +1,154 @@
+import os
 import time
 import math
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Tuple
+import cv2
+import numpy as np
 import pyautogui
 from pyautogui import (
     drag,
     easeOutQuad,
     leftClick,
-    locateAllOnScreen,
     locateOnScreen,
     moveTo,
 )
 
 from src.utils.logger import Logger
-from src.utils.grid_utils import update_grid_after_box, print_grid
+from src.utils.grid_utils import apply_and_score, print_grid
 from src.algorithms.solver import get_solver
 from src.models.box import Strategy
 import src.config as config
 
+# Screen images, resolved from the repository root rather than the CWD
+_IMGS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "imgs",
+)
+
+
+@lru_cache(maxsize=None)
+def _apple_templates() -> List[np.ndarray]:
+    """Decode the greyscale apple templates for digits 1-9 on first use."""
+    templates = []
+    for digit in range(1, 10):
+        path = os.path.join(_IMGS_DIR, f"apple{digit}.png")
+        template = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if template is None:
+            raise FileNotFoundError(f"Could not read apple template: {path}")
+        templates.append(template)
+    return templates
+
+
+def _match_digit(screenshot: np.ndarray, digit: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the (top, left) pixel offsets where the digit's apple matches."""
+    template = _apple_templates()[digit - 1]
+    scores = cv2.matchTemplate(screenshot, template, cv2.TM_CCOEFF_NORMED)
+    return np.nonzero(scores >= 0.99)
+
+
+def read_grid_from_screen(region: tuple) -> np.ndarray:
+    """
+    Read the apple values in the game region from a single screenshot.
+
+    Args:
+        region: Game region as (left, top, width, height) in screen pixels
+
+    Returns:
+        The grid of apple values (0 where no apple was found)
+    """
+    # Match in greyscale: one channel instead of three
+    screenshot = cv2.cvtColor(
+        np.asarray(pyautogui.screenshot(region=region)), cv2.COLOR_RGB2GRAY
+    )
+
+    # Decode the templates here, not in the workers
+    _apple_templates()
+
+    # OpenCV releases the GIL, so the nine matches run concurrently
+    digits = range(1, 10)
+    with ThreadPoolExecutor(max_workers=len(digits)) as executor:
+        matches = executor.map(lambda d: _match_digit(screenshot, d), digits)
+
+        grid = np.zeros((config.NUM_ROWS, config.NUM_COLS), dtype=np.int8)
+        for digit, (local_tops, local_lefts) in zip(digits, matches):
+            rows = local_tops // config.SIZE
+            cols = local_lefts // config.SIZE
+            inside = (rows < config.NUM_ROWS) & (cols < config.NUM_COLS)
+            grid[rows[inside], cols[inside]] = digit
+
+    return grid
+
+
+def _solve_in_worker(algorithm: str, grid: np.ndarray) -> Tuple[str, Strategy]:
+    """Solve a grid in the solver process, returning (solver name, strategy)."""
+    solver = get_solver(algorithm)
+    return solver.name, solver.solve(grid)
+
 
 def run_with_pyautogui(algorithm: str = "dfs", log_dir: str = None) -> None:
     """
     Run the solver using PyAutoGUI to interact with the screen.
 
     Args:
-        algorithm: Algorithm to use ('dfs' or 'qubo')
+        algorithm: Algorithm to use ('dfs', 'qubo' or 'milp')
         log_dir: Directory to save logs
     """
+    # Bind config values used in the drag loop to locals once
+    size, scale = config.SIZE, config.SCALE
+    num_rows, num_cols = config.NUM_ROWS, config.NUM_COLS
+    drag_coef, post_drag_sleep = config.DRAG_DURATION_COEF, config.POST_DRAG_SLEEP
+    verbose = config.VERBOSE
+    # pyautogui jumps instead of dragging at or below MINIMUM_DURATION
+    min_drag_duration = pyautogui.MINIMUM_DURATION + 0.01
+
     # Initialize logger
     logger = Logger()
     logger.initialize_log(mode="gui", log_dir=log_dir)
 
+    # The search runs in its own process (the DFS holds the GIL). Solving an
+    # empty grid there first imports the solver and loads its compiled
+    # kernels while the game is being started.
+    solver_pool = ProcessPoolExecutor(max_workers=1)
+    solver_pool.submit(
+        _solve_in_worker,
+        algorithm,
+        np.zeros((num_rows, num_cols), dtype=np.int8),
+    )
+
     # Find reset button to get game bounds
     try:
-        left, top, _, _ = locateOnScreen("imgs/reset.png", confidence=0.99)
+        left, top, _, _ = locateOnScreen(
+            os.path.join(_IMGS_DIR, "reset.png"), confidence=0.99
+        )
         logger.log_message(f"Reset button position: {left}, {top}")
 
-        left += 8 * config.SCALE
-        top -= 363 * config.SCALE
+        left += 8 * scale
+        top -= 363 * scale
         region = (
             left,
             top,
-            config.SIZE * config.NUM_COLS,
-            config.SIZE * config.NUM_ROWS,
+            size * num_cols,
+            size * num_rows,
         )
         logger.log_message(f"Game region: {region}")
 
         # Click to ensure game window is active
-        leftClick(x=left / config.SCALE, y=top / config.SCALE)
+        leftClick(x=left / scale, y=top / scale)
 
         # Start the game
-        leftClick(
-            x=left / config.SCALE - 3, y=top / config.SCALE + 368
-        )  # Click "Reset"
-        leftClick(
-            x=left / config.SCALE + 150, y=top / config.SCALE + 175
-        )  # Click "Play"
+        leftClick(x=left / scale - 3, y=top / scale + 368)  # Click "Reset"
+        leftClick(x=left / scale + 150, y=top / scale + 175)  # Click "Play"
+
+        # Grid origin and cell size in pointer coordinates
+        origin_x, origin_y = left / scale, top / scale
+        cell = size / scale
         logger.log_message("\n----- New Game Started -----")
 
         # Figure out the apple values
-        grid = [[0 for _ in range(config.NUM_COLS)] for _ in range(config.NUM_ROWS)]
-        total = 0
-        for digit in range(1, 10):
-            for local_left, local_top, _, _ in locateAllOnScreen(
-                f"imgs/apple{digit}.png", region=region, confidence=0.99
-            ):
-                row = int((local_top - top) // config.SIZE)
-                col = int((local_left - left) // config.SIZE)
-                if 0 <= row < config.NUM_ROWS and 0 <= col < config.NUM_COLS:
-                    grid[row][col] = digit
-                    total += digit
+        grid = read_grid_from_screen(region)
+        total = int(grid.sum())
 
         # Print initial grid state
         logger.log_message(f"\nGame Started! Total apple sum: {total}")
@@ -76,10 +157,15 @@ def run_with_pyautogui(algorithm: str = "dfs", log_dir: str = None) -> None:
         # Calculate strategy with timing
         logger.log_message("Starting strategy search...")
         search_start_time = time.time()
+        search = solver_pool.submit(_solve_in_worker, algorithm, grid)
 
-        solver = get_solver(algorithm)
-        strategy = solver.solve(grid)
-        logger.log_message(f"Using {solver.name} algorithm")
+        # Save problem while the search runs
+        problem_filename = logger.problem_path
+        np.savetxt(problem_filename, grid, fmt="%d")
+        logger.log_message(f"Problem saved to: {problem_filename}")
+
+        solver_name, strategy = search.result()
+        logger.log_message(f"Using {solver_name} algorithm")
 
         search_end_time = time.time()
         search_duration = search_end_time - search_start_time
@@ -95,84 +181,73 @@ def run_with_pyautogui(algorithm: str = "dfs", log_dir: str = None) -> None:
         # Set up final log directory based on score
         logger.setup_final_log_directory(strategy.score, mode="gui")
 
-        # Save problem
-        problem_filename = f"{logger.final_log_dir}/problem.txt"
-        with open(problem_filename, "w") as f:
-            for row in grid:
-                f.write(" ".join(str(cell) for cell in row) + "\n")
-        logger.log_message(f"Problem saved to: {problem_filename}")
-
         # Save strategy
-        strategy_filename = f"{logger.final_log_dir}/strategy.txt"
+        strategy_filename = logger.strategy_path
         with open(strategy_filename, "w") as f:
-            f.write(f"Strategy Score: {strategy.score}\n")
-            f.write(f"Execution Mode: GUI Mode (PyAutoGUI)\n")
-            f.write(f"Search Time: {search_duration:.2f} seconds\n\n")
-            for i, box in enumerate(strategy.boxes):
-                f.write(
+            f.write(
+                f"Strategy Score: {strategy.score}\n"
+                "Execution Mode: GUI Mode (PyAutoGUI)\n"
+                f"Search Time: {search_duration:.2f} seconds\n\n"
+                + "".join(
                     f"Box {i+1}: ({box.x}, {box.y}), width {box.width}, height {box.height}\n"
+                    for i, box in enumerate(strategy.boxes)
                 )
+            )
         logger.log_message(f"Strategy saved to: {strategy_filename}")
 
         # Play the game
         logger.log_message("\n----- Executing Strategy -----")
         current_score = 0
+        num_moves, target_score = len(strategy.boxes), strategy.score
         for i, box in enumerate(strategy.boxes):
-            moveTo(
-                (left + box.x * config.SIZE) / config.SCALE,
-                (top + box.y * config.SIZE) / config.SCALE,
+            moveTo(origin_x + box.x * cell, origin_y + box.y * cell)
+            duration = max(
+                drag_coef * math.hypot(box.width, box.height), min_drag_duration
             )
-            duration = 0.08 * math.hypot(box.width, box.height)
             drag(
-                box.width * config.SIZE / config.SCALE,
-                box.height * config.SIZE / config.SCALE,
+                box.width * cell,
+                box.height * cell,
                 duration,
                 easeOutQuad,
                 button="left",
             )
 
             # Update grid and calculate score after drag
-            box_score = sum(
-                1
-                for i in range(box.y, box.y + box.height)
-                for j in range(box.x, box.x + box.width)
-                if grid[i][j] > 0
-            )
+            box_score = apply_and_score(grid, box.x, box.y, box.width, box.height)
             current_score += box_score
-            grid = update_grid_after_box(grid, box)
 
             # Print box info and updated grid
             logger.log_message(
-                f"\nDrag {i+1}/{len(strategy.boxes)}: ({box.x}, {box.y}), width {box.width}, height {box.height}"
+                f"\nDrag {i+1}/{num_moves}: ({box.x}, {box.y}), width {box.width}, height {box.height}"
             )
-            logger.log_message(f"Current score: {current_score}/{strategy.score}")
-            logger.log_message(print_grid(grid))
+            logger.log_message(f"Current score: {current_score}/{target_score}")
+            if box_score:
+                # An empty box leaves the grid as last rendered
+                logger.log_message(print_grid(grid), also_print=verbose)
 
-            # Short delay to better observe results
-            time.sleep(0.5)
+            # Pause to watch each result; otherwise the drag itself (plus
+            # pyautogui's own PAUSE) paces the moves
+            if verbose:
+                time.sleep(post_drag_sleep)
 
         logger.log_message("\n----- Game Complete -----")
         logger.log_message(f"Final Score: {strategy.score}")
 
         # Save result summary
-        with open(logger.log_filename, "a") as log_file:
-            log_file.write("\n" + "-" * 50 + "\n")
-            log_file.write(f"Game Result Summary:\n")
-            log_file.write(
-                f"- Execution Mode: GUI Mode (PyAutoGUI)\n"
-                f"- Start Time: {time.strftime('%Y-%m-%d %H:%M')}\n"
-            )
-            log_file.write(f"- Total Apple Sum: {total}\n")
-            log_file.write(f"- Final Score: {strategy.score}\n")
-            log_file.write(f"- Number of Boxes Used: {len(strategy.boxes)}\n")
-            log_file.write(f"- Algorithm Search Time: {search_duration:.2f} seconds\n")
-            log_file.write("-" * 50 + "\n")
+        separator = "-" * 50 + "\n"
+        logger.write(
+            "\n" + separator + "Game Result Summary:\n"
+            "- Execution Mode: GUI Mode (PyAutoGUI)\n"
+            f"- Start Time: {logger.start_time.strftime('%Y-%m-%d %H:%M')}\n"
+            f"- Total Apple Sum: {total}\n"
+            f"- Final Score: {strategy.score}\n"
+            f"- Number of Boxes Used: {len(strategy.boxes)}\n"
+            f"- Algorithm Search Time: {search_duration:.2f} seconds\n" + separator
+        )
 
         # Save final grid state
-        final_grid_filename = f"{logger.final_log_dir}/final_grid.txt"
-        with open(final_grid_filename, "w") as f:
-            for row in grid:
-                f.write(" ".join(str(cell) for cell in row) + "\n")
+        final_grid_filename = logger.final_grid_path
+        np.savetxt(final_grid_filename, grid, fmt="%d")
 
         logger.log_message(
             f"All log files have been saved to {logger.final_log_dir} directory."
@@ -183,3 +258,6 @@ def run_with_pyautogui(algorithm: str = "dfs", log_dir: str = None) -> None:
         import traceback
 
         logger.log_message(traceback.format_exc())
+    finally:
+        solver_pool.shutdown()
+        logger.close()
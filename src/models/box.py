@@ -4,6 +4,9 @@ from typing import List
 
 @dataclass
 class Box:
+    # Slots instead of a per-instance __dict__ (dataclass(slots=True) needs 3.10)
+    __slots__ = ("x", "y", "width", "height")
+
     x: int
     y: int
     width: int
@@ -12,5 +15,7 @@ class Box:
 
 @dataclass
 class Strategy:
+    __slots__ = ("boxes", "score")
+
     boxes: List[Box]
-    score: int 
\ No newline at end of file
+    score: int
\ No newline at end of file
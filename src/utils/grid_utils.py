@@ -1,63 +1,282 @@
-from typing import List
+from functools import lru_cache
+from typing import List, Optional, Tuple
 import numpy as np
+from numba import njit, prange
 
 from src.models.box import Box
 import src.config as config
 
+# Zobrist keys: one random 64-bit key per (row, column, value)
+ZOBRIST_KEYS = np.random.default_rng(0).integers(
+    0, 2**63, size=(config.HEIGHT, config.WIDTH, 10), dtype=np.uint64
+)
 
-def print_grid(grid: List[List[int]]) -> str:
+# Rendered "value " string for each cell value 0-9
+_CELL_STR = tuple(f"{value} " for value in range(10))
+
+
+def print_grid(grid: np.ndarray) -> str:
     """
     Format grid nicely for display and logging.
     Returns a string representation of the grid.
     """
-    grid_str = "\nCurrent Grid State:\n"
-    for row in range(config.HEIGHT):
-        row_str = ""
-        for col in range(config.WIDTH):
-            val = grid[row][col]
-            row_str += f"{val} "
-        grid_str += row_str + "\n"
-    grid_str += "\n"
-    
-    return grid_str
+    # Cells are single digits, so each one is a lookup instead of a str() call
+    rows = "".join(
+        "".join(map(_CELL_STR.__getitem__, row)) + "\n"
+        for row in np.asarray(grid).tolist()
+    )
+    return "\nCurrent Grid State:\n" + rows + "\n"
 
 
-def update_grid_after_box(grid: List[List[int]], box: Box) -> List[List[int]]:
+def update_grid_after_box(grid: np.ndarray, box: Box) -> np.ndarray:
     """
     Set all values within box area to 0.
     Returns updated grid.
     """
-    for i in range(box.y, box.y + box.height):
-        for j in range(box.x, box.x + box.width):
-            grid[i][j] = 0
+    grid[box.y : box.y + box.height, box.x : box.x + box.width] = 0
     return grid
 
 
-def compute_cumulative_sum(grid: List[List[int]]) -> List[List[int]]:
+@njit(cache=True, boundscheck=False)
+def apply_and_score(grid, x, y, width, height):
+    """
+    Set all values within box area to 0 in place, counting apples as it goes.
+    Returns the number of apples cleared.
+    """
+    score = 0
+    for i in range(y, y + height):
+        for j in range(x, x + width):
+            if grid[i, j] > 0:
+                score += 1
+                grid[i, j] = 0
+    return score
+
+
+def compute_cumulative_sum(
+    grid: np.ndarray, out: Optional[np.ndarray] = None
+) -> np.ndarray:
     """
     Compute cumulative sum matrix for efficient box sum calculations.
-    Returns a 2D matrix of size (HEIGHT+1) x (WIDTH+1).
+    Returns an int32 array of size (HEIGHT+1) x (WIDTH+1), written into out
+    if given (its first row and column must be zero).
+    """
+    if out is None:
+        out = np.zeros((config.HEIGHT + 1, config.WIDTH + 1), dtype=np.int32)
+    np.cumsum(grid, axis=0, out=out[1:, 1:])
+    np.cumsum(out[1:, 1:], axis=1, out=out[1:, 1:])
+    return out
+
+
+def zobrist_hash(grid: np.ndarray) -> np.uint64:
     """
-    cum_sum = [[0 for _ in range(config.WIDTH + 1)] for _ in range(config.HEIGHT + 1)]
-    for i in range(config.HEIGHT):
-        for j in range(config.WIDTH):
-            cum_sum[i + 1][j + 1] = (
-                cum_sum[i + 1][j] + cum_sum[i][j + 1] - cum_sum[i][j] + grid[i][j]
-            )
-    return cum_sum
+    Compute the Zobrist hash of a grid: the XOR of the keys of every cell's value.
+    """
+    np_grid = np.asarray(grid, dtype=np.int8)
+    rows, cols = np.indices(np_grid.shape)
+    return np.bitwise_xor.reduce(ZOBRIST_KEYS[rows, cols, np_grid].ravel())
+
+
+def find_boxes_with_sum_10(grid: np.ndarray) -> np.ndarray:
+    """
+    Find all boxes whose values sum to 10.
+    Returns a read-only int32 array of rows (x, y, width, height, count) ordered
+    by (y, x, height, width), where count is the number of non-zero cells.
+    Results are cached per grid.
+    """
+    return _find_boxes_cached(np.asarray(grid, dtype=np.int8).tobytes())
+
+
+@lru_cache(maxsize=256)
+def _find_boxes_cached(grid_bytes: bytes) -> np.ndarray:
+    np_grid = np.frombuffer(grid_bytes, dtype=np.int8).reshape(
+        config.HEIGHT, config.WIDTH
+    )
+    cum_sum = compute_cumulative_sum(np_grid)
+    cum_nz = compute_cumulative_sum(np_grid > 0)
+
+    boxes = _find_boxes_nb(cum_sum, cum_nz)
+
+    # Shared between callers through the cache
+    boxes.setflags(write=False)
+    return boxes
 
 
-def read_problem_from_file(problem_file: str) -> List[List[int]]:
+@njit(cache=True, inline="always")
+def _box_total(cum_sum, y, x, h, w):
+    return cum_sum[y + h, x + w] - cum_sum[y + h, x] - cum_sum[y, x + w] + cum_sum[y, x]
+
+
+@njit(cache=True, parallel=True)
+def _find_boxes_nb(cum_sum, cum_nz):
+    """
+    Collect (x, y, width, height, count) rows for the boxes summing to 10.
+    Rows of top-left corners are independent, so both passes run in
+    parallel: one counts each row's boxes, the other fills its slice of the
+    output, which keeps the (y, x, height, width) order.
+    """
+    height = cum_sum.shape[0] - 1
+    width = cum_sum.shape[1] - 1
+
+    row_counts = np.zeros(height, dtype=np.int64)
+    for y in prange(height):
+        for x in range(width):
+            for h in range(1, height - y + 1):
+                for w in range(1, width - x + 1):
+                    if _box_total(cum_sum, y, x, h, w) == 10:
+                        row_counts[y] += 1
+
+    offsets = np.zeros(height + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(row_counts)
+    boxes = np.empty((offsets[height], 5), dtype=np.int32)
+    for y in prange(height):
+        k = offsets[y]
+        for x in range(width):
+            for h in range(1, height - y + 1):
+                for w in range(1, width - x + 1):
+                    if _box_total(cum_sum, y, x, h, w) == 10:
+                        boxes[k, 0] = x
+                        boxes[k, 1] = y
+                        boxes[k, 2] = w
+                        boxes[k, 3] = h
+                        boxes[k, 4] = _box_total(cum_nz, y, x, h, w)
+                        k += 1
+    return boxes
+
+
+def compute_box_incidence(grid: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """
+    Build the apple-by-box incidence matrix for the given boxes.
+    Returns a float32 array A where A[apple, box] = 1 if the box covers that
+    apple, with apples in row-major order.
+    """
+    # Test every apple against every box in one broadcast
+    apples = np.argwhere(np.asarray(grid) > 0)
+    r, c = apples[:, 0, None], apples[:, 1, None]
+    x, y, w, h = boxes[:, :4].T
+    return ((x <= c) & (c < x + w) & (y <= r) & (r < y + h)).astype(np.float32)
+
+
+def find_distinct_boxes(boxes: np.ndarray, incidence: np.ndarray) -> np.ndarray:
+    """
+    Find the boxes that are not dominated by another box.
+    A box summing to 10 can never cover a strict subset of another such box's
+    apples (the larger set would sum to more), so the only dominated boxes are
+    those covering exactly the same apples; of each group, the smallest box
+    is kept. Returns the indices of the kept boxes in ascending order.
+    """
+    # One packed bitset of covered apples per box
+    bits = np.packbits(incidence.T.astype(bool), axis=1)
+    by_area = np.argsort(boxes[:, 2] * boxes[:, 3], kind="stable")
+    _, first = np.unique(bits[by_area], axis=0, return_index=True)
+    return np.sort(by_area[first])
+
+
+def find_candidate_boxes(grid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the boxes a set-packing solver (QUBO, MILP) chooses from.
+    Returns the distinct boxes summing to 10, as rows of
+    find_boxes_with_sum_10, and their apple-by-box incidence matrix.
+    """
+    boxes = find_boxes_with_sum_10(grid)
+    incidence = compute_box_incidence(grid, boxes)
+    if len(boxes) == 0:
+        return boxes, incidence
+
+    # Drop boxes covering the same apples as a smaller box
+    keep = find_distinct_boxes(boxes, incidence)
+    return boxes[keep], incidence[:, keep]
+
+
+def determine_box_order(grid: np.ndarray, boxes: List[Box]) -> List[Box]:
+    """
+    Determine the optimal order for selecting boxes based on drag constraints.
+
+    A box can only be selected if the drag path doesn't intersect with other apples.
+    This is a complex problem that could be solved with various approaches:
+
+    1. Try all permutations (only feasible for small number of boxes)
+    2. Use a greedy algorithm (select the box that blocks the fewest other boxes)
+    3. Use a topological sort based on box dependencies
+
+    Args:
+        grid: The original grid
+        boxes: List of boxes to be ordered
+
+    Returns:
+        Ordered list of boxes that satisfies drag constraints
+    """
+    # Implementation would depend on the specific game rules
+    # For example, a simple greedy approach:
+
+    ordered_boxes = []
+    remaining_boxes = boxes.copy()
+    current_grid = grid.copy()
+
+    while remaining_boxes:
+        # Find box that can be selected without interference
+        valid_boxes = []
+        for box in remaining_boxes:
+            if _can_drag_box(current_grid, box):
+                valid_boxes.append(
+                    (box, _count_blocking_boxes(current_grid, box, remaining_boxes))
+                )
+
+        if not valid_boxes:
+            # If no valid boxes, we might have a problem with our strategy
+            # For simplicity, just add remaining boxes in any order
+            ordered_boxes.extend(remaining_boxes)
+            break
+
+        # Select box that blocks the fewest other boxes
+        valid_boxes.sort(key=lambda x: x[1])
+        next_box = valid_boxes[0][0]
+
+        ordered_boxes.append(next_box)
+        remaining_boxes.remove(next_box)
+
+        # Update grid after applying box
+        update_grid_after_box(current_grid, next_box)
+
+    return ordered_boxes
+
+
+def _can_drag_box(grid: np.ndarray, box: Box) -> bool:
+    """
+    Check if a box can be dragged without intersecting other apples.
+
+    Different games may have different drag rules. This is a simplified example.
+    """
+    # Check if the box itself contains only valid apples (no zeros)
+    return bool(np.all(grid[box.y : box.y + box.height, box.x : box.x + box.width] != 0))
+
+
+def _count_blocking_boxes(grid: np.ndarray, box: Box, remaining_boxes: List[Box]) -> int:
+    """
+    Count how many other boxes this box would block if selected.
+
+    A box blocks another box if selecting it would remove apples needed by the other box.
+    """
+    # Create a copy of the grid after applying this box
+    temp_grid = update_grid_after_box(grid.copy(), box)
+
+    # Count boxes that would become invalid
+    blocked_count = 0
+    for other_box in remaining_boxes:
+        if other_box != box and not _can_drag_box(temp_grid, other_box):
+            blocked_count += 1
+
+    return blocked_count
+
+
+def read_problem_from_file(problem_file: str) -> Optional[np.ndarray]:
     """
     Read grid from problem file.
-    Returns the grid as a 2D list or None if there was an error.
+    Returns the grid as an int8 array or None if there was an error.
     """
-    grid = []
     try:
         with open(problem_file, "r") as f:
-            for line in f:
-                row = [int(val) for val in line.strip().split()]
-                grid.append(row)
+            # Keep the tokens as strings; NumPy parses them in one C pass below
+            grid = [line.split() for line in f]
 
         # Validate grid dimensions
         if len(grid) != config.HEIGHT:
@@ -69,7 +288,16 @@ def read_problem_from_file(problem_file: str) -> List[List[int]]:
                 print(f"Error: Row {i} should have {config.WIDTH} columns, but has {len(row)}")
                 return None
 
-        return grid
+        np_grid = np.array(grid, dtype=np.int8)
+
+        # Validate cell values: apples are 1-9, empty cells 0
+        invalid = np.argwhere((np_grid < 0) | (np_grid > 9))
+        if len(invalid):
+            i, j = invalid[0]
+            print(f"Error: Cell ({i}, {j}) should be between 0 and 9, but is {np_grid[i, j]}")
+            return None
+
+        return np_grid
     except Exception as e:
         print(f"Error reading problem file: {e}")
         return None 
\ No newline at end of file
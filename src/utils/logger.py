@@ -1,30 +1,74 @@
+import atexit
 import os
 import datetime
 import shutil
+import sys
 from typing import Optional
 
+# Directories already created by this process
+_created_dirs = set()
+
+
+def _makedirs(path: str) -> None:
+    """Create a directory tree once per process"""
+    if path not in _created_dirs:
+        os.makedirs(path, exist_ok=True)
+        _created_dirs.add(path)
+
 
 class Logger:
     def __init__(self):
         """Initialize logger with temporary log file"""
         self.logs_base_dir = "logs"
-        self.current_time = datetime.datetime.now().strftime("%Y%m%d-%H%M")
+        # Read the clock once; every timestamp below is formatted from it
+        self.start_time = datetime.datetime.now()
+        self.current_time = self.start_time.strftime("%Y%m%d-%H%M")
         self.tmp_log_filename = (
             f"{self.logs_base_dir}/temp_game_log_{self.current_time}.txt"
         )
         self.final_log_dir = None
         self.log_filename = self.tmp_log_filename
+        # Output file paths in final_log_dir, set once the directory is known
+        self.problem_path = None
+        self.strategy_path = None
+        self.final_grid_path = None
+        # Buffered handle on log_filename, opened on first write; while open
+        # it is flushed at interpreter exit if the caller never closes it
+        self._log_file = None
 
         # Create log directory
-        os.makedirs(self.logs_base_dir, exist_ok=True)
+        _makedirs(self.logs_base_dir)
 
     def log_message(self, message: str, also_print: bool = True) -> None:
         """Record message to log file and optionally print to console"""
         if also_print:
-            print(message)
-
-        with open(self.log_filename, "a") as log_file:
-            log_file.write(message + "\n")
+            sys.stdout.write(message)
+            sys.stdout.write("\n")
+
+        self.write(message)
+        self.write("\n")
+
+    def write(self, text: str) -> None:
+        """Append raw text to the log file"""
+        if self._log_file is None:
+            self._open_log_file("a")
+        self._log_file.write(text)
+
+    def close(self) -> None:
+        """Flush buffered messages and close the log file"""
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+            atexit.unregister(self.close)
+
+    def _open_log_file(self, mode: str) -> None:
+        self._log_file = open(self.log_filename, mode, buffering=1 << 16)
+        atexit.register(self.close)
+
+    def _set_output_paths(self) -> None:
+        self.problem_path = os.path.join(self.final_log_dir, "problem.txt")
+        self.strategy_path = os.path.join(self.final_log_dir, "strategy.txt")
+        self.final_grid_path = os.path.join(self.final_log_dir, "final_grid.txt")
 
     def setup_final_log_directory(
         self, score: int, mode: str = "gui", problem_file: Optional[str] = None
@@ -41,16 +85,17 @@ class Logger:
             else:
                 self.final_log_dir = f"{self.logs_base_dir}/{self.current_time}_{score}"
 
-            os.makedirs(self.final_log_dir, exist_ok=True)
+            _makedirs(self.final_log_dir)
+            self._set_output_paths()
 
             # If we're using a temporary log file, move it to the final location
             if self.log_filename == self.tmp_log_filename:
                 new_log_filename = f"{self.final_log_dir}/game_log.txt"
 
-                # Copy contents from temporary log file to new log file
+                # Move the temporary log file into place (a rename on the same filesystem)
+                self.close()
                 if os.path.exists(self.tmp_log_filename):
-                    shutil.copy(self.tmp_log_filename, new_log_filename)
-                    os.remove(self.tmp_log_filename)  # Delete temporary file
+                    shutil.move(self.tmp_log_filename, new_log_filename)
 
                 # Update log filename
                 self.log_filename = new_log_filename
@@ -66,7 +111,7 @@ class Logger:
         if log_dir:
             self.final_log_dir = log_dir
         else:
-            timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+            timestamp = self.start_time.strftime("%Y%m%d-%H%M%S")
             if mode == "file" and problem_file:
                 problem_name = os.path.splitext(os.path.basename(problem_file))[0]
                 self.final_log_dir = f"logs/file_{problem_name}/default/{timestamp}"
@@ -74,14 +119,15 @@ class Logger:
                 self.final_log_dir = f"logs/gui/default/{timestamp}"
 
         # Create log directory if it doesn't exist
-        os.makedirs(self.final_log_dir, exist_ok=True)
+        _makedirs(self.final_log_dir)
+        self._set_output_paths()
 
         # Set log filename directly to final location
         self.log_filename = os.path.join(self.final_log_dir, "log.txt")
 
         # Create header
         header = f"Fruit Box Game Log - {mode.capitalize()} Mode\n"
-        header += f"Start Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}\n"
+        header += f"Start Time: {self.start_time.strftime('%Y-%m-%d %H:%M')}\n"
 
         if mode == "file" and problem_file:
             problem_filename = os.path.basename(problem_file)
@@ -89,5 +135,6 @@ class Logger:
 
         header += "\n"
 
-        with open(self.log_filename, "w") as log_file:
-            log_file.write(header)
+        self.close()
+        self._open_log_file("w")
+        self._log_file.write(header)